@@ -1,94 +1,249 @@
 # py2slack/auth.py
 
 import os
-import json
+import sys
+import pickle
+import logging
+import tempfile
+import functools
+import threading
 from typing import Dict, Optional, Tuple
 from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+
+log = logging.getLogger(__name__)
+
+# Prefer orjson's C-accelerated parser for the JSON config when available
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
+# python-dotenv is optional; probe for it once at import time
+try:
+    from dotenv import load_dotenv
+    _HAS_DOTENV = True
+except ImportError:
+    _HAS_DOTENV = False
 
 
 # Define paths for configuration files
 ENV_FILE = '.env'            # .env file (requires python-dotenv)
 CONFIG_FILE = 'slack_config.json'  # JSON configuration file
 
+# (environment variable, config key) pairs the loaders look for.
+# Interned so the repeated dict/set lookups compare by pointer.
+_KEYS = (
+    (sys.intern('SLACK_OAUTH_TOKEN'), sys.intern('oauth_token')),
+    (sys.intern('SLACK_DEFAULT_CHANNEL'), sys.intern('default_channel')),
+)
+
+# Config keys that must be present for the client to work
+_REQUIRED = tuple(cfg_key for _, cfg_key in _KEYS)
+
+# On-disk cache of the file-derived config, keyed by a fingerprint of the
+# source files so any edit invalidates it
+_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'py2slack')
+_CACHE_FILE = os.path.join(_CACHE_DIR, 'config.pkl')
+
+def _fingerprint() -> tuple:
+    """
+    Return (abspath, mtime_ns, size) per config file, with a None stat
+    for missing files.
+
+    The absolute path keys the single cache slot to the project the
+    files belong to, so runs from different directories neither thrash
+    the cache nor serve each other's tokens on an (mtime, size)
+    coincidence.
+    """
+    fp = []
+    for path in (ENV_FILE, CONFIG_FILE):
+        abs_path = os.path.abspath(path)
+        try:
+            st = os.stat(abs_path)
+            fp.append((abs_path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            fp.append((abs_path, None))
+    return tuple(fp)
+
+def _read_config_cache(fingerprint: tuple) -> Optional[Dict[str, str]]:
+    """Return the cached config if its fingerprint still matches, else None."""
+    try:
+        with open(_CACHE_FILE, 'rb') as f:
+            cached_fp, config = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, ValueError):
+        return None
+    if cached_fp != fingerprint:
+        return None
+    return config
+
+def _write_config_cache(fingerprint: tuple, config: Dict[str, str]) -> None:
+    """Atomically write the cache with owner-only permissions."""
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((fingerprint, config), f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, _CACHE_FILE)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        log.debug("Could not write config cache: %s", e)
+
+def _parse_env_file() -> Optional[Dict[str, str]]:
+    """
+    Minimal .env parser covering the two keys py2slack needs.
+
+    Returns None when the file uses $-expansion or inline comments,
+    which only python-dotenv handles correctly.
+    """
+    wanted = {env_key.encode(): cfg_key for env_key, cfg_key in _KEYS}
+    config = {}
+    with open(ENV_FILE, 'rb') as f:
+        data = f.read()
+    if b'$' in data:
+        return None
+    for line in data.splitlines():
+        line = line.strip()
+        if not line or line.startswith(b'#'):
+            continue
+        key, _, value = line.partition(b'=')
+        key = key.strip()
+        if key.startswith(b'export '):
+            key = key[7:].strip()
+        cfg_key = wanted.get(key)
+        if cfg_key is not None:
+            if b'#' in value:
+                # Inline comment (or a '#' inside quotes): dotenv's
+                # rules decide where the value ends, not this parser.
+                return None
+            value = value.strip().strip(b'"\'')
+            if value:
+                # Empty assignments stay missing, matching the env-var
+                # and dotenv loaders, so the missing-config warning fires.
+                config[cfg_key] = value.decode()
+    return config
+
 def load_from_dotenv_file() -> Dict[str, str]:
     """Load configuration from a .env file."""
     config = {}
     try:
-        # Use python-dotenv to load environment variables from the file
-        from dotenv import load_dotenv
-        load_dotenv(ENV_FILE)
-        
-        oauth_token = os.getenv('SLACK_OAUTH_TOKEN')
-        default_channel = os.getenv('SLACK_DEFAULT_CHANNEL')
-        
-        if oauth_token:
-            config['oauth_token'] = oauth_token
-        if default_channel:
-            config['default_channel'] = default_channel
-        
-        missing = []
-        if 'oauth_token' not in config:
-            missing.append('SLACK_OAUTH_TOKEN')
-        if 'default_channel' not in config:
-            missing.append('SLACK_DEFAULT_CHANNEL')
-        
+        parsed = _parse_env_file()
+        if parsed is not None:
+            config = parsed
+        elif _HAS_DOTENV:
+            # The file uses expansions; let python-dotenv handle it.
+            load_dotenv(ENV_FILE)
+            env = os.environ
+            for env_key, cfg_key in _KEYS:
+                value = env.get(env_key)
+                if value:
+                    config[cfg_key] = value
+        else:
+            log.warning("python-dotenv is not installed; cannot read the '%s' file.", ENV_FILE)
+            return config
+
+        missing = [env_key for env_key, cfg_key in _KEYS if cfg_key not in config]
         if missing:
-            print(f"Warning: The following variables are missing in the '{ENV_FILE}' file: {', '.join(missing)}")
-        
+            log.warning("The following variables are missing in the '%s' file: %s", ENV_FILE, ', '.join(missing))
+
+        return config
+    except FileNotFoundError:
         return config
     except Exception as e:
-        print(f"Error loading environment variables: {e}")
+        log.error("Error loading environment variables: %s", e)
         return config
 
+@functools.lru_cache(maxsize=1)
 def load_slack_config() -> Dict[str, str]:
     """Load Slack configuration from environment variables, .env file, or JSON file."""
     config = {}
 
     # Step 1: Load from environment variables
-    oauth_token = os.getenv('SLACK_OAUTH_TOKEN')
-    default_channel = os.getenv('SLACK_DEFAULT_CHANNEL')
-    if oauth_token:
-        config['oauth_token'] = oauth_token
-    if default_channel:
-        config['default_channel'] = default_channel
+    env = os.environ
+    for env_key, cfg_key in _KEYS:
+        value = env.get(env_key)
+        if value:
+            config[cfg_key] = value
+
+    # Fully configured from the environment (the norm for containerized
+    # deployments): skip the file probing altogether.
+    if all(key in config for key in _REQUIRED):
+        return config
+
+    from_env = frozenset(config)
+
+    # Check for the configuration files once; every os.path.exists is a stat() syscall.
+    env_exists = os.path.exists(ENV_FILE)
+    cfg_exists = os.path.exists(CONFIG_FILE)
+
+    # Consult the on-disk cache before re-parsing the config files;
+    # environment variables above always take priority.
+    missing = [key for key in _REQUIRED if key not in config]
+    fingerprint = None
+    cache_hit = False
+    if missing:
+        fingerprint = _fingerprint()
+        cached = _read_config_cache(fingerprint)
+        if cached is not None:
+            cache_hit = True
+            for key in missing:
+                if key in cached:
+                    config[key] = cached[key]
 
     # Step 2: Load from .env file if any configuration is missing
-    missing = {'oauth_token', 'default_channel'} - config.keys()
-    if missing or os.path.exists(ENV_FILE):
+    missing = [key for key in _REQUIRED if key not in config]
+    if missing and env_exists:
         env_config = load_from_dotenv_file()
         for key in missing:
             if key in env_config:
                 config[key] = env_config[key]
 
     # Step 3: Load from JSON file if configuration is still missing
-    missing = {'oauth_token', 'default_channel'} - config.keys()
-    if missing or os.path.exists(CONFIG_FILE):
+    missing = [key for key in _REQUIRED if key not in config]
+    if missing:
         try:
-            with open(CONFIG_FILE) as f:
-                json_config = json.load(f)
-                for key in missing:
-                    if key in json_config:
-                        config[key] = json_config[key]
-        except json.JSONDecodeError:
-            print(f"Warning: Invalid JSON in configuration file '{CONFIG_FILE}'.")
+            # Binary mode: both json and orjson accept bytes, so skip the
+            # text-codec layer entirely.
+            with open(CONFIG_FILE, 'rb') as f:
+                json_config = _loads(f.read())
+            for key in missing:
+                if key in json_config:
+                    config[key] = json_config[key]
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            log.warning("Invalid JSON in configuration file '%s'.", CONFIG_FILE)
         except Exception as e:
-            print(f"Unexpected error while loading config from JSON: {e}")
+            log.error("Unexpected error while loading config from JSON: %s", e)
+
+    # Refresh the cache with whatever the files contributed this run
+    if fingerprint is not None and not cache_hit:
+        file_config = {k: v for k, v in config.items() if k not in from_env}
+        if file_config:
+            _write_config_cache(fingerprint, file_config)
 
     # Final check for missing configuration values
-    missing = {'oauth_token', 'default_channel'} - config.keys()
+    missing = [key for key in _REQUIRED if key not in config]
     if missing:
-        print(f"Warning: The following configuration is still missing: {', '.join(missing)}")
-        if not os.path.exists(ENV_FILE) and not os.path.exists(CONFIG_FILE):
-            print(f"Warning: Both '{ENV_FILE}' and '{CONFIG_FILE}' are missing.")
-        elif not os.path.exists(ENV_FILE):
-            print(f"Warning: '{ENV_FILE}' is missing.")
-        elif not os.path.exists(CONFIG_FILE):
-            print(f"Warning: '{CONFIG_FILE}' is missing.")
+        log.warning("The following configuration is still missing: %s", ', '.join(missing))
+        if not env_exists and not cfg_exists:
+            log.warning("Both '%s' and '%s' are missing.", ENV_FILE, CONFIG_FILE)
+        elif not env_exists:
+            log.warning("'%s' is missing.", ENV_FILE)
+        elif not cfg_exists:
+            log.warning("'%s' is missing.", CONFIG_FILE)
         else:
-            print(f"Warning: Both '{ENV_FILE}' and '{CONFIG_FILE}' are present, but still missing configuration.")
+            log.warning("Both '%s' and '%s' are present, but still missing configuration.", ENV_FILE, CONFIG_FILE)
 
     return config
 
+@functools.lru_cache(maxsize=1)
 def initialize_slack_client() -> Tuple[Optional[WebClient], Optional[str]]:
     """Initialize the Slack client using the loaded configuration."""
     config = load_slack_config()
@@ -96,17 +251,58 @@ def initialize_slack_client() -> Tuple[Optional[WebClient], Optional[str]]:
     default_channel = config.get('default_channel')
     
     if not slack_token:
-        print("Warning: Missing 'oauth_token' in configuration. Slack functionality will be disabled.")
+        log.warning("Missing 'oauth_token' in configuration. Slack functionality will be disabled.")
         return None, None
     
-    try:
-        client = WebClient(token=slack_token)
-        # Test the connection
-        client.auth_test()
-        return client, default_channel  # default_channel can be None
-    except Exception as e:
-        print(f"Error initializing Slack client: {e}")
-        return None, None
+    # Constructing the client performs no I/O, so there is nothing left
+    # to catch here; a failure would be a programming error worth raising.
+    client = WebClient(token=slack_token, timeout=10)
+    # Retry 429s with backoff inside the client's own session, so
+    # back-to-back sends reuse one connection instead of failing.
+    client.retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=3))
+    return client, default_channel  # default_channel can be None
+
+# Verification state for the lazily created client
+_verify_lock = threading.Lock()
+_verified: Optional[bool] = None
+
+def verify_slack_client() -> bool:
+    """
+    Check the client once on first use and cache the verdict.
+
+    The auth.test probe costs a full HTTPS round-trip and the first real
+    API call surfaces auth errors just as well, so it only runs when the
+    PY2SLACK_VERIFY environment variable is set.
+    """
+    global _verified
+    with _verify_lock:
+        if _verified is None:
+            client, _ = initialize_slack_client()
+            if client is None:
+                _verified = False
+            elif not os.environ.get('PY2SLACK_VERIFY'):
+                _verified = True
+            else:
+                try:
+                    client.auth_test()
+                    _verified = True
+                except Exception as e:
+                    log.error("Error verifying Slack client: %s", e)
+                    _verified = False
+        return _verified
+
+def reset_slack_client() -> None:
+    """Clear the cached configuration and client (mainly useful in tests)."""
+    global _verified
+    load_slack_config.cache_clear()
+    initialize_slack_client.cache_clear()
+    with _verify_lock:
+        _verified = None
 
-# Initialize the Slack client as constants
-CLIENT, DEFAULT_CHANNEL = initialize_slack_client()
+def __getattr__(name: str):
+    # Lazily build the client so importing the package never hits the network.
+    if name == 'CLIENT':
+        return initialize_slack_client()[0]
+    if name == 'DEFAULT_CHANNEL':
+        return initialize_slack_client()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,15 +3,197 @@
 import os
 import sys
 import time
+import atexit
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
 import traceback
 from functools import wraps
 from typing import Optional, Callable, TypeVar
+from urllib.request import Request, urlopen
 from slack_sdk.errors import SlackApiError
-from .auth import CLIENT, DEFAULT_CHANNEL
+from . import auth
+
+log = logging.getLogger(__name__)
+
+__all__ = ["send_slack", "send_slack_async", "slack_notify", "format_duration", "batch_notifications"]
 
 F = TypeVar("F", bound=Callable[..., object])
 
-def send_slack(text: str = "", file: Optional[str] = None, channel: Optional[str] = None) -> None:
+# sys.argv[0] is fixed for the lifetime of the process
+_SCRIPT_NAME = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "unknown"
+
+# Captured once for error messages; reassign py2slack.notify._CWD if the
+# host application chdirs and wants accurate diagnostics.
+_CWD = os.getcwd()
+
+# Uploads below this size are sent as an in-memory buffer; larger files
+# are streamed from disk via the external-upload flow. Tunable via the
+# PY2SLACK_UPLOAD_MEMORY_LIMIT environment variable (bytes).
+try:
+    _SMALL_UPLOAD_BYTES = int(os.environ.get('PY2SLACK_UPLOAD_MEMORY_LIMIT', 8 * 1024 * 1024))
+except ValueError:
+    _SMALL_UPLOAD_BYTES = 8 * 1024 * 1024
+
+# Socket timeout for the raw upload POST. It bounds each blocking socket
+# operation rather than the whole transfer, so a stalled connection fails
+# fast while a slow-but-moving upload of any size still completes.
+_UPLOAD_TIMEOUT_SECONDS = 30
+
+# Opt-in dedup (send_slack(..., dedup=True)): hashes of recent payloads
+# are kept in a small sqlite database so identical notifications from
+# re-run scripts are sent only once per TTL window.
+_DEDUP_DB = os.path.join(os.path.expanduser('~'), '.cache', 'py2slack', 'sent.sqlite')
+_DEDUP_TTL_SECONDS = 600
+_dedup_lock = threading.Lock()
+
+def _dedup_hash(text: str, file: Optional[str], used_channel: str) -> bytes:
+    payload = f"{used_channel}\0{text}\0{file or ''}".encode()
+    return hashlib.sha256(payload).digest()
+
+def _dedup_check(h: bytes) -> bool:
+    """Report whether this payload hash was recorded within the TTL."""
+    now = int(time.time())
+    try:
+        os.makedirs(os.path.dirname(_DEDUP_DB), exist_ok=True)
+        with _dedup_lock, sqlite3.connect(_DEDUP_DB) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sent (hash BLOB PRIMARY KEY, ts INTEGER)")
+            row = db.execute("SELECT ts FROM sent WHERE hash = ?", (h,)).fetchone()
+            return row is not None and now - row[0] < _DEDUP_TTL_SECONDS
+    except (OSError, sqlite3.Error) as e:
+        log.debug("Dedup cache unavailable: %s", e)
+    return False
+
+def _dedup_record(h: bytes) -> None:
+    """Record a successfully delivered payload hash and prune expired entries."""
+    now = int(time.time())
+    try:
+        os.makedirs(os.path.dirname(_DEDUP_DB), exist_ok=True)
+        with _dedup_lock, sqlite3.connect(_DEDUP_DB) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sent (hash BLOB PRIMARY KEY, ts INTEGER)")
+            db.execute("INSERT OR REPLACE INTO sent VALUES (?, ?)", (h, now))
+            db.execute("DELETE FROM sent WHERE ts < ?", (now - _DEDUP_TTL_SECONDS,))
+    except (OSError, sqlite3.Error) as e:
+        log.debug("Dedup cache unavailable: %s", e)
+
+# Per-thread batching state used by batch_notifications
+_batch_state = threading.local()
+
+class batch_notifications:
+    """
+    Context manager that collects text-only notifications sent inside the
+    block and posts them as a single combined Slack message on exit.
+
+    Useful when send_slack (or slack_notify) fires in a tight loop: N API
+    round-trips collapse into one, which also keeps the sender under
+    Slack's per-channel rate limit. Messages with a file attachment
+    bypass the batch and are sent immediately; per-message channels are
+    ignored in favor of the channel given here. Blocks nest: an inner
+    block's combined message joins the enclosing batch.
+    """
+    def __init__(self, channel: Optional[str] = None):
+        self._channel = channel
+        self._prev = None
+
+    def __enter__(self):
+        # Stash any enclosing batch so nested blocks compose instead of
+        # clobbering each other's collected messages.
+        self._prev = getattr(_batch_state, 'messages', None)
+        _batch_state.messages = []
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        messages = _batch_state.messages
+        if self._prev is None:
+            del _batch_state.messages
+        else:
+            _batch_state.messages = self._prev
+        if messages:
+            # With an enclosing batch restored, this lands there.
+            send_slack("\n".join(messages), channel=self._channel)
+        return False
+
+def _stream_upload(client, fh, name: str, size: int, channel: str, text: str) -> None:
+    """
+    Upload a large file with Slack's external-upload flow, streaming it
+    from an already-open handle.
+
+    files_upload_v2 buffers the entire file in memory even when given a
+    path, so for big files we drive the three-step flow ourselves: fetch
+    an upload URL, POST the open file handle (http.client reads it in
+    small blocks), then finalize the upload against the channel.
+    """
+    resp = client.files_getUploadURLExternal(filename=name, length=size)
+    upload_url = resp["upload_url"]
+    file_id = resp["file_id"]
+
+    req = Request(upload_url, data=fh, method="POST")
+    req.add_header("Content-Length", str(size))
+    req.add_header("Content-Type", "application/octet-stream")
+    with urlopen(req, timeout=_UPLOAD_TIMEOUT_SECONDS) as r:
+        r.read()
+
+    client.files_completeUploadExternal(
+        files=[{"id": file_id, "title": name}],
+        channel_id=channel,
+        initial_comment=text,
+    )
+
+def _deliver(text: str, file: Optional[str], channel: Optional[str],
+             dedup: bool = False) -> None:
+    """Resolve the client and post one message or file; may raise SlackApiError."""
+    client = auth.CLIENT
+    default_channel = auth.DEFAULT_CHANNEL
+
+    if client is None or not auth.verify_slack_client():
+        log.warning("Slack functionality is disabled due to missing configuration.")
+        return
+
+    used_channel = channel or default_channel
+    if used_channel is None:
+        log.error("No channel specified. Please provide a channel or set a default channel in the configuration.")
+        return
+
+    if dedup:
+        payload_hash = _dedup_hash(text, file, used_channel)
+        if _dedup_check(payload_hash):
+            log.info("Skipping duplicate notification (sent within the last %d seconds).",
+                     _DEDUP_TTL_SECONDS)
+            return
+
+    if file is None:
+        client.chat_postMessage(channel=used_channel, text=text)
+    else:
+        name = os.path.basename(file)
+        # One os.open + fstat supplies existence, size, and the handle:
+        # the single source of truth for the upload-strategy decision.
+        fd = os.open(file, os.O_RDONLY)
+        with os.fdopen(fd, "rb") as fh:
+            size = os.fstat(fd).st_size
+            if size < _SMALL_UPLOAD_BYTES:
+                # Small files: one read, sent from memory.
+                client.files_upload_v2(
+                    channel=used_channel,
+                    content=fh.read(),
+                    filename=name,
+                    title=name,
+                    initial_comment=text,
+                    # Skip the extra files.info round-trip after the upload.
+                    request_file_info=False,
+                )
+            else:
+                # Large files: stream from the same descriptor.
+                _stream_upload(client, fh, name, size, used_channel, text)
+    if dedup:
+        # Only a delivered payload counts as seen, so failed sends can
+        # still be retried within the TTL.
+        _dedup_record(payload_hash)
+    log.info("Message sent successfully")
+
+def send_slack(text: str = "", file: Optional[str] = None, channel: Optional[str] = None,
+               async_: bool = False, dedup: bool = False) -> None:
     """
     Send a message or file to Slack.
 
@@ -19,39 +201,138 @@ def send_slack(text: str = "", file: Optional[str] = None, channel: Optional[str
         text (str): The text message to send.
         file (Optional[str]): Path to the file to upload.
         channel (Optional[str]): Slack channel ID to send the message to.
+        async_ (bool): Queue the message for background delivery instead
+            of blocking on the Slack round-trip.
+        dedup (bool): Skip the send if an identical notification was
+            delivered within the last ten minutes (tracked across
+            processes).
     """
-    if CLIENT is None:
-        print("Slack functionality is disabled due to missing configuration.")
+    if not text and file is None:
+        log.warning("Nothing to send: no text and no file were provided.")
         return
 
-    if channel is None and DEFAULT_CHANNEL is None:
-        print("Error: No channel specified. Please provide a channel or set a default channel in the configuration.")
+    # Inside a batch_notifications block, collect text-only messages
+    # instead of posting them one by one.
+    batch = getattr(_batch_state, 'messages', None)
+    if batch is not None and file is None:
+        batch.append(text)
         return
 
-    used_channel = channel or DEFAULT_CHANNEL
+    if async_:
+        send_slack_async(text, file, channel, dedup=dedup)
+        return
 
     try:
-        if file is None:
-            response = CLIENT.chat_postMessage(channel=used_channel, text=text)
-        else:
-            if not os.path.exists(file):
-                print(f"Warning: Local file not found: {file}")
-                print(f"Current working directory: {os.getcwd()}")
-                return
-            
-            with open(file, "rb") as file_content:
-                response = CLIENT.files_upload_v2(
-                    channel=used_channel,
-                    file=file_content,
-                    filename=os.path.basename(file),
-                    title=os.path.basename(file),
-                    initial_comment=text
-                )
-        print("Message sent successfully")
+        _deliver(text, file, channel, dedup=dedup)
+    except FileNotFoundError:
+        log.warning("Local file not found: %s", file)
+        log.warning("Current working directory: %s", _CWD)
     except SlackApiError as e:
-        print(f"Error sending message: {e.response['error']}")
+        log.error("Error sending message: %s", e.response['error'])
     except Exception as e:
-        print(f"Unexpected error while sending message: {e}")
+        log.error("Unexpected error while sending message: %s", e)
+
+# Background delivery: messages are queued and sent by a daemon thread so
+# callers never wait on the Slack round-trip.
+_send_queue: "queue.Queue" = queue.Queue()
+_worker_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+
+# How long the worker waits for further messages before posting, so a
+# burst of sends becomes a single multi-line message.
+_COALESCE_WINDOW_SECONDS = 0.5
+
+def _deliver_with_retry(text: str, file: Optional[str], channel: Optional[str],
+                        dedup: bool = False) -> None:
+    while True:
+        try:
+            _deliver(text, file, channel, dedup=dedup)
+        except SlackApiError as e:
+            # The worker can afford to wait out rate limits.
+            if e.response.get('error') == 'ratelimited':
+                delay = int(e.response.headers.get('Retry-After', 1))
+                log.warning("Rate limited by Slack; retrying in %d seconds.", delay)
+                time.sleep(delay)
+                continue
+            log.error("Error sending message: %s", e.response['error'])
+        except FileNotFoundError:
+            log.warning("Local file not found: %s", file)
+            log.warning("Current working directory: %s", _CWD)
+        except Exception as e:
+            log.error("Unexpected error while sending message: %s", e)
+        return
+
+def _drain_queue() -> None:
+    while True:
+        items = [_send_queue.get()]
+        deadline = time.monotonic() + _COALESCE_WINDOW_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(_send_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        count = len(items)
+        try:
+            # Lazily built messages (e.g. deferred traceback rendering)
+            # are resolved here, off the caller's critical path.
+            items = [(text() if callable(text) else text, file, channel, dedup)
+                     for text, file, channel, dedup in items]
+
+            # A burst of text-only messages for one channel collapses
+            # into a single multi-line post, which also respects Slack's
+            # ~1 msg/s per-channel rate limit.
+            if (count > 1
+                    and all(file is None for _, file, _, _ in items)
+                    and len({channel for _, _, channel, _ in items}) == 1):
+                # The combined post is deduplicated only if every part
+                # asked for it.
+                items = [("\n".join(text for text, _, _, _ in items), None,
+                          items[0][2], all(dedup for _, _, _, dedup in items))]
+
+            for text, file, channel, dedup in items:
+                _deliver_with_retry(text, file, channel, dedup=dedup)
+        except Exception as e:
+            # The sole worker must never die with tasks outstanding:
+            # the atexit queue join would block interpreter exit forever.
+            log.error("Error preparing notification batch: %s", e)
+        finally:
+            for _ in range(count):
+                _send_queue.task_done()
+
+def _ensure_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_drain_queue, name="py2slack-sender", daemon=True)
+            _worker.start()
+            # Flush pending messages before the interpreter exits.
+            atexit.register(_send_queue.join)
+
+def send_slack_async(text: str = "", file: Optional[str] = None, channel: Optional[str] = None,
+                     dedup: bool = False) -> None:
+    """
+    Queue a message or file for delivery without blocking the caller.
+
+    The arguments match send_slack; delivery happens on a background
+    daemon thread, and pending messages are flushed at interpreter exit.
+    """
+    if not text and file is None:
+        log.warning("Nothing to send: no text and no file were provided.")
+        return
+
+    # Inside a batch_notifications block, text-only messages join the
+    # batch instead of the queue (lazily built ones are rendered here).
+    batch = getattr(_batch_state, 'messages', None)
+    if batch is not None and file is None:
+        batch.append(text() if callable(text) else text)
+        return
+
+    _ensure_worker()
+    _send_queue.put((text, file, channel, dedup))
 
 def format_duration(elapsed: float) -> str:
     """
@@ -63,48 +344,67 @@ def format_duration(elapsed: float) -> str:
     Returns:
         str: A formatted duration string.
     """
-    days = int(elapsed // 86400)
-    elapsed %= 86400
-    hours = int(elapsed // 3600)
-    elapsed %= 3600
-    minutes = int(elapsed // 60)
-    seconds = elapsed % 60
-
-    parts = []
-    if days > 0:
-        parts.append(f"{days} day{'s' if days != 1 else ''}")
-    if hours > 0:
-        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
-    if minutes > 0:
-        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    whole = int(elapsed)
+    days, rem = divmod(whole, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, seconds = divmod(rem, 60)
+    seconds += elapsed - whole  # keep the fractional part
+
+    parts = [
+        f"{value} {unit}{'s' * (value != 1)}"
+        for value, unit in ((days, 'day'), (hours, 'hour'), (minutes, 'minute'))
+        if value > 0
+    ]
     if seconds > 0 or not parts:
-        parts.append(f"{seconds:.2f} second{'s' if seconds != 1 else ''}")
-    
+        parts.append(f"{seconds:.2f} second{'s' * (seconds != 1)}")
+
     return ', '.join(parts)
 
-def slack_notify(func: F) -> F:
+def slack_notify(func: Optional[F] = None, *, include_traceback: bool = True, suppress: tuple = ()):
     """
     Decorator that sends a Slack notification upon completion or error of the decorated function.
     The notification includes the original function name and a human-friendly formatted execution time.
+
+    Parameters:
+        include_traceback (bool): Include the full traceback in error notifications.
+        suppress (tuple): Exception types whose tracebacks are omitted from the notification.
     """
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        script_name = os.path.basename(sys.argv[0]) if sys.argv else "unknown"
-        try:
-            result = func(*args, **kwargs)
-            elapsed = time.time() - start_time
-            duration_str = format_duration(elapsed)
-            send_slack(f"[{script_name}] Function '{func.__name__}' completed successfully in {duration_str}!")
-            return result
-        except Exception as e:
-            elapsed = time.time() - start_time
-            duration_str = format_duration(elapsed)
-            error_message = (
-                f"[{script_name}] Function '{func.__name__}' encountered an error after {duration_str}:\n{str(e)}\n\n"
-                f"Traceback:\n{traceback.format_exc()}"
-            )
-            print(error_message)
-            send_slack(error_message)
-            raise
-    return wrapper
+    def decorate(func: F) -> F:
+        # Bound once per decorated function: closure loads beat global
+        # lookups in the per-call path.
+        _send_async = send_slack_async
+        # Everything but the duration is known now, so build the message
+        # prefixes once instead of interpolating per call.
+        success_prefix = f"[{_SCRIPT_NAME}] Function '{func.__name__}' completed successfully in "
+        error_prefix = f"[{_SCRIPT_NAME}] Function '{func.__name__}' encountered an error after "
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start_time = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+                elapsed = time.monotonic() - start_time
+                duration_str = format_duration(elapsed)
+                _send_async(success_prefix + duration_str + "!")
+                return result
+            except Exception as e:
+                elapsed = time.monotonic() - start_time
+                duration_str = format_duration(elapsed)
+                error_message = error_prefix + duration_str + ":\n" + str(e)
+                log.error("%s", error_message)
+                if include_traceback and not isinstance(e, suppress):
+                    # Capture the traceback data here (cheap, no frame
+                    # locals); rendering happens on the worker thread so
+                    # the exception propagates without waiting for it.
+                    tb = traceback.TracebackException.from_exception(e)
+                    _send_async(lambda prefix=error_message, tb=tb:
+                                prefix + "\n\nTraceback:\n" + "".join(tb.format()))
+                else:
+                    _send_async(error_message)
+                raise
+        return wrapper
+
+    # Support both @slack_notify and @slack_notify(...)
+    if func is None:
+        return decorate
+    return decorate(func)